@@ -1,6 +1,6 @@
 import telebot
+import argparse
 import configparser
-import subprocess
 from src import (
     mesh_interp,
     reverse_interp,
@@ -18,13 +18,13 @@ except Exception as e:
     print(f"Error reading configuration file: {e}")
     exit(1)
 
+# starting bot once, shared by every notification
+bot = telebot.TeleBot(TOKEN)
+
 def ntfy(msg: str) -> None:
     """
     Sends `msg` string to Telegram bot defined with `TOKEN` and `CHAT_ID` global variables.
     """
-    # starting bot
-    bot = telebot.TeleBot(TOKEN)
-
     try:
         bot.send_message(CHAT_ID, msg)
     except Exception as e:
@@ -32,10 +32,14 @@ def ntfy(msg: str) -> None:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs MLCCM interpolation, training and testing.")
+    parser.add_argument("--gpu", action="store_true", help="solve interpolations on GPU with CuPy")
+    args = parser.parse_args()
+
     ntfy("Starting code")
 
     ntfy("Running interpolation")
-    status = mesh_interp.main()
+    status = mesh_interp.main(gpu=args.gpu)
     if status == 1:
         ntfy("Couldn't execute interpolation... leaving")
         exit(1)
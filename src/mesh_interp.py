@@ -1,12 +1,24 @@
 import numpy as np
+import argparse
 import csv
 import configparser
 import os
 import time
 import pandas as pd
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice, product
+from threadpoolctl import threadpool_limits
+from typing import Iterator, Tuple
 from numpy.typing import NDArray
-from scipy.interpolate import Rbf
+from scipy.linalg import lu_factor, lu_solve
+from scipy.spatial.distance import cdist
+
+# optional GPU backend
+try:
+    import cupy as cp
+    from cupyx.scipy.linalg import lu_solve as cp_lu_solve
+except ImportError:
+    cp = None
 
 # reading config file and accessing variables
 config = configparser.ConfigParser()
@@ -26,6 +38,7 @@ IN_FILES = [X_TRAIN, X_TEST]
 GRIDS = [20, 30, 40]
 METHODS = ["linear", "cubic", "multiquadric"]
 BUFF_TSHOLD = 100
+TIMESTEPS = 20
 
 def mesh_gen(n_points: int) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
     """
@@ -35,48 +48,236 @@ def mesh_gen(n_points: int) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
     """
 
     # define the grid
-    try:
-        x = np.linspace(0, 30, n_points)
-        y = np.linspace(0, 30, n_points)
-        xx, yy = np.meshgrid(x, y)
-        points = np.column_stack([xx.flatten(), yy.flatten()])
-    except Exception as e:
-        print(f"Error generating mesh grid: {e}")
-        return None, None
-
-    # conditions inside the square region
-    in_main_square = (points[:, 0] >= 0) & (points[:, 0] <= 30) & (points[:, 1] >= 0) & (points[:, 1] <= 30)
-    out_excluded_square = ~((points[:, 0] > 15) & (points[:, 0] <= 30) & (points[:, 1] > 15) & (points[:, 1] <= 30))
-    out_excluded_circle = ((points[:, 0] - 15)**2 + (points[:, 1] - 15)**2) >= 7**2
-    in_fillet_circ_1 = ((points[:, 0] - 12.5)**2 + (points[:, 1] - 24.17)**2) <= 2.5**2
-    in_fillet_circ_2 = ((points[:, 0] - 24.17)**2 + (points[:, 1] - 12.5)**2) <= 2.5**2
-    out_square_1 = (points[:, 0] > 13.16) & (points[:, 0] < 15) & (points[:, 1] > 21.75) & (points[:, 1] < 24.17)
-    out_square_2 = (points[:, 0] > 21.75) & (points[:, 0] < 24.17) & (points[:, 1] > 13.16) & (points[:, 1] < 15)
-    square_1_cond = out_square_1 & in_fillet_circ_1
-    square_2_cond = out_square_2 & in_fillet_circ_2
-
-    # combine all conditions
-    final_region = (
-        in_main_square
-        & out_excluded_square
-        & out_excluded_circle
-        & ~out_square_1
-        & ~out_square_2
+    x = np.linspace(0, 30, n_points)
+    y = np.linspace(0, 30, n_points)
+    xx, yy = np.meshgrid(x, y)
+    px, py = xx.ravel(), yy.ravel()
+
+    # points inside the two fillet squares
+    in_square_1 = (px > 13.16) & (px < 15) & (py > 21.75) & (py < 24.17)
+    in_square_2 = (px > 21.75) & (px < 24.17) & (py > 13.16) & (py < 15)
+
+    # fillet squares keep only points inside their fillet circles, every other point of the
+    # 30x30 grid is kept outside the upper right square and the central circle
+    final_region = np.where(
+        in_square_1 | in_square_2,
+        (in_square_1 & ((px - 12.5)**2 + (py - 24.17)**2 <= 2.5**2))
+        | (in_square_2 & ((px - 24.17)**2 + (py - 12.5)**2 <= 2.5**2)),
+        ~((px > 15) & (py > 15)) & ((px - 15)**2 + (py - 15)**2 >= 7**2)
     )
-    final_region |= square_1_cond | square_2_cond
 
-    # extract the valid points and separate into x and y coordinates
-    valid_points = points[final_region]
-    x_coords = valid_points[:, 0]  # all rows, first column
-    y_coords = valid_points[:, 1]  # all rows, second column
+    # extract the valid points as x and y coordinates
+    x_coords = px[final_region]
+    y_coords = py[final_region]
     
     return x_coords, y_coords
 
-def interpolator(infile: str, grid: int, method: str, x: NDArray[np.float64], y: NDArray[np.float64]):
+def rbf_epsilon(x: NDArray[np.float64], y: NDArray[np.float64]) -> float:
+    """
+    Returns the shape parameter `Rbf` uses by default for nodes `x` and `y`,
+    i.e. the average distance between nodes based on their bounding box.
+    """
+
+    edges = np.array([np.ptp(x), np.ptp(y)])
+    edges = edges[np.nonzero(edges)]
+
+    return np.power(np.prod(edges) / len(x), 1.0 / edges.size)
+
+def build_phi(
+        pts: NDArray[np.float64],
+        nodes: NDArray[np.float64],
+        method: str,
+        epsilon: float
+    ) -> NDArray[np.float64]:
+    """
+    Returns the (`m`,`n`) `method` radial basis function matrix, as defined by `Rbf`,
+    between `m` points `pts` and `n` nodes `nodes` with shape parameter `epsilon`.
+    The kernel is applied in place over the (squared) distance matrix.
+    """
+
+    if method == "linear":
+        return cdist(pts, nodes)
+    if method == "cubic":
+        phi = cdist(pts, nodes)
+        return np.power(phi, 3, out=phi)
+    if method == "multiquadric":
+        # work on squared distances, so no square root is taken before squaring again
+        phi = cdist(pts, nodes, "sqeuclidean")
+        phi /= epsilon**2
+        phi += 1
+        return np.sqrt(phi, out=phi)
+
+    raise ValueError(f"Unknown RBF method: {method}")
+
+def rbf_system(
+        src_x: NDArray[np.float64],
+        src_y: NDArray[np.float64],
+        dst_x: NDArray[np.float64],
+        dst_y: NDArray[np.float64],
+        method: str
+    ) -> Tuple[Tuple[NDArray[np.float64], NDArray[np.int32]], NDArray[np.float64]]:
+    """
+    Builds the `method` RBF system over source nodes `src_x` and `src_y`, returning
+    a tuple with its LU factorization and the (`m`,`n`) kernel matrix evaluated at the
+    `m` destination points `dst_x` and `dst_y`. Nodal data `d` is then interpolated with
+    `b_eval @ lu_solve(lu_piv, d)`, so the system is factorized only once for any data.
+    Raises `ValueError` if the system is singular, e.g. for duplicated source nodes.
+    """
+
+    src_pts = np.column_stack([src_x, src_y])
+    dst_pts = np.column_stack([dst_x, dst_y])
+    epsilon = rbf_epsilon(src_x, src_y)
+
+    # kernel matrix is built here and finite by construction, so factorize it in place
+    lu_piv = lu_factor(build_phi(src_pts, src_pts, method, epsilon), overwrite_a=True, check_finite=False)
+    b_eval = build_phi(dst_pts, src_pts, method, epsilon)
+
+    # a zero (or negligible) pivot means solves would return NaN/Inf for every grid point
+    pivots = np.abs(np.diag(lu_piv[0]))
+    if not np.isfinite(lu_piv[0]).all() or pivots.min() <= np.finfo(np.float64).eps * len(pivots) * pivots.max():
+        raise ValueError(f"singular {method} RBF system, check for duplicated nodes")
+
+    return lu_piv, b_eval
+
+def batch_apply(
+        defs: NDArray[np.float64],
+        lu_piv: Tuple[NDArray[np.float64], NDArray[np.int32]],
+        b_eval: NDArray[np.float64],
+        gpu: bool = False
+    ) -> NDArray[np.float64]:
+    """
+    Solves RBF weights with LU factorization `lu_piv` for every (`n`,`c`) nodal data block
+    of `defs` (simulations x timesteps) and interpolates them with `b_eval`. All blocks are
+    stacked into a single right-hand side, so the whole batch is one triangular solve and
+    one matmul. If `gpu` is set, `lu_piv` and `b_eval` must be CuPy arrays.
+    """
+
+    n_sims, n_steps, n, n_ch = defs.shape
+
+    # (n, sims x timesteps x channels) right-hand side, a fresh copy that can be solved in place
+    rhs = defs.transpose(2, 0, 1, 3).reshape(n, -1)
+    if gpu:
+        grid_defs = cp.asnumpy(b_eval @ cp_lu_solve(lu_piv, cp.asarray(rhs), overwrite_b=True, check_finite=False))
+    else:
+        grid_defs = b_eval @ lu_solve(lu_piv, rhs, overwrite_b=True, check_finite=False)
+
+    return grid_defs.reshape(-1, n_sims, n_steps, n_ch).transpose(1, 2, 0, 3)
+
+def interp_sims(
+        sims: NDArray[np.float64],
+        lu_piv: Tuple[NDArray[np.float64], NDArray[np.int32]],
+        b_eval: NDArray[np.float64],
+        gpu: bool = False
+    ) -> NDArray[np.float64]:
+    """
+    Interpolates a batch of simulations `sims`, shaped (`sims`, `TIMESTEPS`, forces + strains),
+    with the RBF system `lu_piv` and evaluation matrix `b_eval` given by `rbf_system`,
+    returning a (`sims`, `TIMESTEPS` x (forces + strains)) array with one row of forces and
+    interpolated strains per simulation. If `gpu` is set, `lu_piv` and `b_eval` must be CuPy arrays.
+    """
+
+    n_sims = len(sims)
+
+    # split simulations into forces and (x, y, xy) strains of each timestep
+    forces = sims[:, :, :2]
+    defs = sims[:, :, 2:].reshape(n_sims, TIMESTEPS, -1, 3)
+
+    # solve RBF weights for all parameters and interpolate
+    grid_defs = batch_apply(defs, lu_piv, b_eval, gpu)
+
+    # fill preallocated buffer with forces followed by grid strains of each timestep
+    bg_bf = np.empty((n_sims, TIMESTEPS, 2 + grid_defs.shape[2] * 3))
+    bg_bf[:, :, :2] = forces
+    bg_bf[:, :, 2:] = grid_defs.reshape(n_sims, TIMESTEPS, -1)
+
+    return bg_bf.reshape(n_sims, -1)
+
+def count_rows(infile: str) -> int:
+    """
+    Returns the number of simulations of `infile` data file, either a `.npy` array
+    or a csv file with a header line.
+    """
+
+    if infile.endswith(".npy"):
+        return len(np.load(infile, mmap_mode="r"))
+
+    with open(infile, mode='r') as file:
+        return sum(1 for _ in file) - 1
+
+def read_chunks(infile: str) -> Iterator[NDArray[np.float64]]:
+    """
+    Streams `infile` data file, either a memory-mapped `.npy` array or a csv file
+    whose header is skipped, yielding arrays of up to `BUFF_TSHOLD` rows.
+    """
+
+    if infile.endswith(".npy"):
+        data = np.load(infile, mmap_mode="r")
+        for k in range(0, len(data), BUFF_TSHOLD):
+            yield np.asarray(data[k:k + BUFF_TSHOLD], dtype=np.float64)
+        return
+
+    with open(infile, mode='r') as file:
+        next(file)
+        while lines := list(islice(file, BUFF_TSHOLD)):
+            yield np.loadtxt(lines, delimiter=",", ndmin=2)
+
+def interp_file(
+        infile: str,
+        outfile: str,
+        lu_piv: Tuple[NDArray[np.float64], NDArray[np.int32]],
+        b_eval: NDArray[np.float64],
+        gpu: bool = False
+    ) -> None:
+    """
+    Interpolates every simulation of `infile` data file, made of `TIMESTEPS` blocks of
+    forces followed by nodal strains, with the RBF system `lu_piv` and evaluation matrix
+    `b_eval` given by `rbf_system`. Simulations are interpolated, on GPU if `gpu` is set,
+    in batches of `BUFF_TSHOLD` and written straight into the `outfile` `.npy` array.
+    """
+
+    # one row of forces and (x, y, xy) grid strains per timestep for each simulation
+    shape = (count_rows(infile), TIMESTEPS * (2 + 3 * b_eval.shape[0]))
+    out = np.lib.format.open_memmap(outfile, mode="w+", dtype=np.float64, shape=shape)
+
+    # move RBF system to device once for all batches
+    if gpu:
+        lu_piv = (cp.asarray(lu_piv[0]), cp.asarray(lu_piv[1]))
+        b_eval = cp.asarray(b_eval)
+
+    # for each batch of simulations
+    row = 0
+    for chunk in read_chunks(infile):
+        # split simulations into timesteps
+        sims = chunk.reshape(len(chunk), TIMESTEPS, -1)
+
+        # interpolate and dump big buffer to its rows of the output array
+        out[row:row + len(sims)] = interp_sims(sims, lu_piv, b_eval, gpu)
+        row += len(sims)
+
+    out.flush()
+    del out
+
+def init_worker(n_threads: int) -> None:
+    """
+    Caps BLAS threads of each interpolation worker process to `n_threads`,
+    so concurrent interpolations don't oversubscribe the CPU.
+    """
+
+    threadpool_limits(n_threads)
+
+def interpolator(
+        infile: str,
+        grid: int,
+        method: str,
+        lu_piv: Tuple[NDArray[np.float64], NDArray[np.int32]],
+        b_eval: NDArray[np.float64],
+        gpu: bool = False
+    ):
     """
     Interpolates `infile` csv data file with a mesh grid of `grid`x`grid` points
-    using any `method` from `scipy.interpolate Rbf`. Integration points coordinates `x` and `y` must
-    be given.
+    using any `method` kernel from `build_phi`. The RBF system `lu_piv` and evaluation
+    matrix `b_eval` from centroids to grid points, given by `rbf_system`, must be given.
+    Solves run on GPU through CuPy if `gpu` is set.
     """
 
     # start timer
@@ -85,88 +286,16 @@ def interpolator(infile: str, grid: int, method: str, x: NDArray[np.float64], y:
     # extract the base name (without extension) from the original file
     bname = os.path.basename(infile)
     bname = os.path.splitext(bname)[0]
-    fname = f"{bname}_{grid}_{method}.csv"
+    fname = f"{bname}_{grid}_{method}.npy"
     new_fname = os.path.join(DATA, fname)
 
     # checking for previous data files
     if os.path.isfile(new_fname):
         os.remove(new_fname)
 
-    grid_x, grid_y = mesh_gen(grid)
-
-    if grid_x == None:
-        return None
-
     # imports centroids' parameters of each test (single line) into separate arrays
     try:
-        with open(infile, mode='r') as file:
-            reader = csv.reader(file)
-            next(reader)
-            bg_bf = []
-            # for each simulation
-            for k, row in enumerate(reader, start=1):
-                bf = []
-                # for each timestep
-                for j in range (0,20):
-                    # initialize arrays
-                    def_x = []
-                    def_y = []
-                    def_xy = []
-                    grid_def_x = []
-                    grid_def_y = []
-                    grid_def_xy = []
-                    c = j*564*3+j*2
-                    x_force = row[c]
-                    y_force = row[c+1]
-
-                    # for each element
-                    for i in range(c+2, c+2+564*3, 3):
-                        def_x.append(row[i])
-                        def_y.append(row[i + 1])
-                        def_xy.append(row[i + 2])
-
-                    def_x = np.array(def_x, dtype=float)
-                    def_y = np.array(def_y, dtype=float)
-                    def_xy = np.array(def_xy, dtype=float)
-
-                    # create RBF interpolators for each parameter
-                    rbf_def_x = Rbf(x, y, def_x, function=method)
-                    rbf_def_y = Rbf(x, y, def_y, function=method)
-                    rbf_def_xy = Rbf(x, y, def_xy, function=method)
-
-                    # interpolate on the grid
-                    grid_def_x = rbf_def_x(grid_x, grid_y)
-                    grid_def_y = rbf_def_y(grid_x, grid_y)
-                    grid_def_xy = rbf_def_xy(grid_x, grid_y)
-                    
-                    # replace nan values with 0
-                    grid_def_x = np.nan_to_num(grid_def_x)
-                    grid_def_y = np.nan_to_num(grid_def_y)
-                    grid_def_xy = np.nan_to_num(grid_def_xy)
-
-                    bf.append(x_force)
-                    bf.append(y_force)
-
-                    for i in range(0, len(grid_def_x)):
-                        bf.append(grid_def_x[i])
-                        bf.append(grid_def_y[i])
-                        bf.append(grid_def_xy[i])
-
-                # dump buffer to big buffer
-                bg_bf.append(bf)
-                
-                # dump big buffer to file
-                if len(bg_bf) == BUFF_TSHOLD and not os.path.isfile(new_fname):
-                    p = pd.DataFrame(bg_bf)
-                    p.to_csv(new_fname, mode="a", header=True, index=False)
-                    bg_bf = []
-                elif len(bg_bf) == BUFF_TSHOLD and os.path.isfile(new_fname):
-                    p = pd.DataFrame(bg_bf)
-                    p.to_csv(new_fname, mode="a", header=False, index=False)
-                    bg_bf = []
-        
-        p = pd.DataFrame(bg_bf)
-        p.to_csv(new_fname, mode="a", header=False, index=False)
+        interp_file(infile, new_fname, lu_piv, b_eval, gpu)
 
     except Exception as e:
         print(f"Error interpolating input file: {e}")
@@ -190,14 +319,18 @@ def interpolator(infile: str, grid: int, method: str, x: NDArray[np.float64], y:
             "interpolation_duration": elapsed_time
             }
 
-def main():
+def main(gpu: bool = False):
     """
-    Main function to start code execution.
+    Main function to start code execution. Interpolation solves run on GPU if `gpu` is set.
     """
 
     # start timer
     start_time = time.time()
 
+    if gpu and cp == None:
+        print("Error interpolating on GPU: CuPy is not installed")
+        return 1
+
     # checking for previous data files
     if os.path.exists(METRICS):
         os.remove(METRICS)
@@ -219,17 +352,52 @@ def main():
         print(f"Error importing centroid coordinates: {e}")
         return 1
 
-    for grid in GRIDS:
-        for method in METHODS:
-            for file in IN_FILES:
-                result = interpolator(file, grid, method, x, y)
-                if result == None:  # ensure result is not None
-                    return 1
-                # save results
-                result_df = pd.DataFrame([result])
-                write_header = not os.path.exists(METRICS)
-                result_df.to_csv(METRICS, mode="a", header=write_header, index=False)
-                print(f"Metrics saved to {METRICS}")
+    # generate each grid once
+    try:
+        meshes = {grid: mesh_gen(grid) for grid in GRIDS}
+    except Exception as e:
+        print(f"Error generating mesh grid: {e}")
+        return 1
+
+    # factorize each (grid, method) RBF system once, as centroids and grid are the same
+    # for every simulation of every input file, timing each build
+    systems, system_durations = {}, {}
+    try:
+        for grid, method in product(GRIDS, METHODS):
+            system_start = time.time()
+            systems[(grid, method)] = rbf_system(x, y, *meshes[grid], method)
+            system_durations[(grid, method)] = time.time() - system_start
+    except Exception as e:
+        print(f"Error building RBF system: {e}")
+        return 1
+
+    # every (grid, method, file) interpolation is independent, so run them concurrently on CPU,
+    # while GPU solves run one at a time so jobs don't contend for a single device
+    combos = list(product(GRIDS, METHODS, IN_FILES))
+    n_cpus = os.cpu_count() or 1
+    workers = 1 if gpu else min(len(combos), n_cpus)
+    n_threads = max(1, n_cpus // workers)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(n_threads,)) as executor:
+        futures = [
+            executor.submit(interpolator, file, grid, method, *systems[(grid, method)], gpu)
+            for grid, method, file in combos
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if result == None:  # ensure result is not None
+                executor.shutdown(wait=False, cancel_futures=True)
+                return 1
+            # each file's duration includes its system build, as it did when every job fitted
+            # its own system, and is recorded with the number of concurrent workers
+            result["system_duration"] = system_durations[(result["grid"], result["method"])]
+            result["interpolation_duration"] += result["system_duration"]
+            result["workers"] = workers
+            # save results
+            result_df = pd.DataFrame([result])
+            write_header = not os.path.exists(METRICS)
+            result_df.to_csv(METRICS, mode="a", header=write_header, index=False)
+            print(f"Metrics saved to {METRICS}")
 
     # end the timer and calculate elapsed time in minutes and seconds
     end_time = time.time()
@@ -245,4 +413,7 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Interpolates centroid strains onto grids.")
+    parser.add_argument("--gpu", action="store_true", help="solve interpolations on GPU with CuPy")
+    args = parser.parse_args()
+    exit(main(gpu=args.gpu))
\ No newline at end of file
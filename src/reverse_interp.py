@@ -6,9 +6,7 @@ import time
 import pandas as pd
 from typing import Tuple
 from numpy.typing import NDArray
-from scipy.interpolate import Rbf
-from sklearn.metrics import r2_score,mean_absolute_error,mean_absolute_percentage_error
-from mesh_interp import mesh_gen
+from mesh_interp import mesh_gen, rbf_system, interp_file, read_chunks
 
 # Reading configuration file
 config = configparser.ConfigParser()
@@ -24,12 +22,32 @@ REV_METRICS = config.get("Files", "rev_interp_metrics")
 IN_FILES = [X_TRAIN]
 GRIDS = [20, 30, 40]
 METHODS = ["linear", "cubic", "multiquadric"]
-BUFF_TSHOLD = 100
+
+def rev_metrics(ori: NDArray[np.float64], pred: NDArray[np.float64]) -> Tuple[float, float, float]:
+    """
+    Returns a tuple with the R-squared, MAE and MAPE of `pred` against `ori` arrays,
+    averaged over columns as `sklearn.metrics` does, computed from their shared residuals.
+    """
+
+    diff = ori - pred
+    abs_diff = np.abs(diff)
+
+    # per column R-squared, 1 for constant columns fitted exactly and 0 otherwise
+    ss_res = np.einsum("ij,ij->j", diff, diff)
+    dev = ori - ori.mean(axis=0)
+    ss_tot = np.einsum("ij,ij->j", dev, dev)
+    varying = ss_tot != 0
+    r2 = np.where(varying, 1 - ss_res / np.where(varying, ss_tot, 1), (ss_res == 0).astype(float))
+
+    mae = abs_diff.mean()
+    mape = (abs_diff / np.maximum(np.abs(ori), np.finfo(np.float64).eps)).mean()
+
+    return r2.mean(), mae, mape
 
 def inv_interpolator(infile: str, grid: int, method: str, x: NDArray[np.float64], y: NDArray[np.float64]):
     """
     Interpolates `infile` csv data file with a mesh grid of `grid`x`grid` points
-    using any `method` from `scipy.interpolate Rbf`. Integration points coordinates `x` and `y` must
+    using any `method` kernel from `build_phi`. Integration points coordinates `x` and `y` must
     be given.
     """
     # start timer
@@ -38,9 +56,9 @@ def inv_interpolator(infile: str, grid: int, method: str, x: NDArray[np.float64]
     # extract the base name (without extension) from the original file
     bname = os.path.basename(infile)
     bname = os.path.splitext(bname)[0]
-    fname = f"{bname}_{grid}_{method}.csv"
+    fname = f"{bname}_{grid}_{method}.npy"
     new_fname = os.path.join(DATA, fname)
-    fname_inv = f"{bname}_{grid}_{method}_inv.csv"
+    fname_inv = f"{bname}_{grid}_{method}_inv.npy"
     new_fname_inv = os.path.join(DATA, fname_inv)
 
     # checking for interpolated data
@@ -52,82 +70,22 @@ def inv_interpolator(infile: str, grid: int, method: str, x: NDArray[np.float64]
     if os.path.isfile(new_fname_inv):
         os.remove(new_fname_inv)
 
-    grid_x, grid_y = mesh_gen(grid)
+    try:
+        grid_x, grid_y = mesh_gen(grid)
+    except Exception as e:
+        print(f"Error generating mesh grid: {e}")
+        return None
 
-    if grid_x == None:
+    # factorize RBF system once, as grid and centroids are the same for every simulation
+    try:
+        lu_piv, b_eval = rbf_system(grid_x, grid_y, x, y, method)
+    except Exception as e:
+        print(f"Error building RBF system: {e}")
         return None
 
     # imports centroids' parameters of each test (single line) into separate arrays
     try:
-        with open(new_fname, mode='r') as file:
-            reader = csv.reader(file)
-            next(reader)
-            bg_bf = []
-            # for each simulation
-            for k, row in enumerate(reader, start=1):
-                bf = []
-                n_el = int((len(row)/20-2)/3)
-                # for each timestep
-                for j in range (0,20):
-                    # initialize arrays
-                    def_x = []
-                    def_y = []
-                    def_xy = []
-                    grid_def_x = []
-                    grid_def_y = []
-                    grid_def_xy = []
-                    c = j*n_el*3+j*2
-                    x_force = row[c]
-                    y_force = row[c+1]
-
-                    # for each element
-                    for i in range(c+2, c+2+n_el*3, 3):
-                        def_x.append(row[i])
-                        def_y.append(row[i + 1])
-                        def_xy.append(row[i + 2])
-
-                    def_x = np.array(def_x, dtype=float)
-                    def_y = np.array(def_y, dtype=float)
-                    def_xy = np.array(def_xy, dtype=float)
-
-                    # create RBF interpolators for each parameter
-                    rbf_def_x = Rbf(grid_x, grid_y, def_x, function=method)
-                    rbf_def_y = Rbf(grid_x, grid_y, def_y, function=method)
-                    rbf_def_xy = Rbf(grid_x, grid_y, def_xy, function=method)
-
-                    # interpolate on the grid
-                    grid_def_x = rbf_def_x(x, y)
-                    grid_def_y = rbf_def_y(x, y)
-                    grid_def_xy = rbf_def_xy(x, y)
-                    
-                    # replace nan values with 0
-                    grid_def_x = np.nan_to_num(grid_def_x)
-                    grid_def_y = np.nan_to_num(grid_def_y)
-                    grid_def_xy = np.nan_to_num(grid_def_xy)
-
-                    bf.append(x_force)
-                    bf.append(y_force)
-
-                    for i in range(0, len(grid_def_x)):
-                        bf.append(grid_def_x[i])
-                        bf.append(grid_def_y[i])
-                        bf.append(grid_def_xy[i])
-
-                # dump buffer to big buffer
-                bg_bf.append(bf)
-                
-                # dump big buffer to file
-                if len(bg_bf) == BUFF_TSHOLD and not os.path.isfile(new_fname_inv):
-                    p = pd.DataFrame(bg_bf)
-                    p.to_csv(new_fname_inv, mode="a", header=True, index=False)
-                    bg_bf = []
-                elif len(bg_bf) == BUFF_TSHOLD and os.path.isfile(new_fname_inv):
-                    p = pd.DataFrame(bg_bf)
-                    p.to_csv(new_fname_inv, mode="a", header=False, index=False)
-                    bg_bf = []
-
-        p = pd.DataFrame(bg_bf)
-        p.to_csv(new_fname_inv, mode="a", header=False, index=False)
+        interp_file(new_fname, new_fname_inv, lu_piv, b_eval)
 
     except Exception as e:
         print(f"Error interpolating input file: {e}")
@@ -135,8 +93,8 @@ def inv_interpolator(infile: str, grid: int, method: str, x: NDArray[np.float64]
 
     # gets preficted file data
     try:
-        ori = pd.read_csv(infile)
-        predict = pd.read_csv(new_fname_inv)
+        ori = np.concatenate(list(read_chunks(infile)))
+        predict = np.load(new_fname_inv, mmap_mode="r")
 
     except Exception as e:
         print(f"Error reading interpolated files for metrics: {e}")
@@ -144,9 +102,7 @@ def inv_interpolator(infile: str, grid: int, method: str, x: NDArray[np.float64]
     
     # calculates metrics
     try:
-        r2 = r2_score(ori, predict)
-        mae = mean_absolute_error(ori, predict)
-        mape = mean_absolute_percentage_error(ori, predict)
+        r2, mae, mape = rev_metrics(ori, predict)
     except Exception as e:
         print(f"Error calculating performance metrics: {e}")
         return
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import os
 from sklearn.metrics import (
@@ -32,7 +33,7 @@ def test_and_evaluate(grid, method, test_method):
 
     # construct paths to the testing files
     x_test = os.path.join(
-        DATA, f"x_test_{grid}_{test_method}.csv"
+        DATA, f"x_test_{grid}_{test_method}.npy"
     )
     xgb_model = os.path.join(
         MODELS, f"xgb_{grid}_{method}.joblib"
@@ -41,7 +42,7 @@ def test_and_evaluate(grid, method, test_method):
     # load feature and target data
     try:
         print(f"Loading data from {x_test} and {Y_TEST}")
-        X_test = pd.read_csv(x_test)
+        X_test = pd.DataFrame(np.load(x_test))
         y_test = pd.read_csv(Y_TEST)
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
@@ -159,5 +160,7 @@ def main():
         f"Total elapsed time: {elapsed_minutes}:{elapsed_seconds:02d} minutes."
     )
 
+    return 0
+
 if __name__ == "__main__":
     exit(main())
\ No newline at end of file
@@ -1,4 +1,5 @@
 import configparser
+import numpy as np
 import pandas as pd
 import time
 import joblib
@@ -34,13 +35,13 @@ def train_and_evaluate(grid: int, method: str):
 
     # construct paths to the training files
     x_train = os.path.join(
-        DATA, f"x_train_{grid}_{method}.csv"
+        DATA, f"x_train_{grid}_{method}.npy"
     )
 
     # load feature and target data
     try:
         print(f"Loading data from {x_train} and {Y_TRAIN}")
-        X_train = pd.read_csv(x_train)
+        X_train = pd.DataFrame(np.load(x_train))
         y_train = pd.read_csv(Y_TRAIN)
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
@@ -88,17 +88,11 @@ global_min, global_max = x_ori_exx.min(), x_ori_exx.max()
 for grid in GRIDS:
     x_coords, y_coords = mesh_gen(grid)
     for method in METHODS:
-        interpolated_file = f"x_train_{grid}_{method}.csv"
+        interpolated_file = f"x_train_{grid}_{method}.npy"
 
         # Interpolated exx values
-        x_int_exx = []
-        with open(os.path.join(DATA, interpolated_file), 'r') as file:
-            reader = csv.reader(file)
-            header = next(reader)
-            row = next(reader)
-            for i in range(len(row) - (int(len(row) / 20) - 2), len(row), 3):
-                x_int_exx.append(float(row[i]))
-        x_int_exx = np.array(x_int_exx)
+        row = np.load(os.path.join(DATA, interpolated_file), mmap_mode='r')[0]
+        x_int_exx = np.array(row[len(row) - (int(len(row) / 20) - 2)::3])
 
         # Update global color scale
         global_min = min(global_min, np.nanmin(x_int_exx))
@@ -51,16 +51,10 @@ def plot_config():
     }
     return config
 
-def tst_simple_bymethod_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(TST_METRICS)
-
+def tst_simple_bymethod_plot(filtered_df: pd.DataFrame):
     # load config
     plt_conf = plot_config()
 
-    # filters data
-    filtered_df = df[df['model_method'] == df['test_method']]
-
     # Set up the plotting grid
     fig, axes = plt.subplots(1, 3, figsize=(18, 6), sharey=False)
     fig.canvas.manager.set_window_title(f"{inspect.stack()[0][3]}")
@@ -96,16 +90,11 @@ def tst_simple_bymethod_plot():
     # shows plot
     # plt.show()
 
-def tst_simple_bygrid_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(TST_METRICS)
-
+def tst_simple_bygrid_plot(filtered_df: pd.DataFrame):
     # load config
     plt_conf = plot_config()
 
-    # filters data
-    filtered_df = df[df['model_method'] == df['test_method']]
-    # filtered_df = filtered_df[df['grid'] == 20]
+    # filtered_df = filtered_df[filtered_df['grid'] == 20]
 
     # Define figure size
     fig_width_in = 13.7 / 2.54  # Convert cm to inches
@@ -159,10 +148,7 @@ def tst_simple_bygrid_plot():
     # shows plot
     # plt.show()
 
-def tst_cross_bymethod_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(TST_METRICS)
-
+def tst_cross_bymethod_plot(df: pd.DataFrame):
     # load config
     plt_conf = plot_config()
 
@@ -202,10 +188,7 @@ def tst_cross_bymethod_plot():
     # Show plot
     # plt.show()
 
-def tst_cross_bygrid_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(TST_METRICS)
-
+def tst_cross_bygrid_plot(df: pd.DataFrame):
     # load config
     plt_conf = plot_config()
 
@@ -245,10 +228,7 @@ def tst_cross_bygrid_plot():
     # Show plot
     # plt.show()
 
-def rev_interp_bymethod_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(REV_INTERP_METRICS)
-
+def rev_interp_bymethod_plot(df: pd.DataFrame):
     # load config
     plt_conf = plot_config()
 
@@ -286,10 +266,7 @@ def rev_interp_bymethod_plot():
     # shows plot
     # plt.show()
 
-def rev_interp_bygrid_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(REV_INTERP_METRICS)
-
+def rev_interp_bygrid_plot(df: pd.DataFrame):
     # load config
     plt_conf = plot_config()
 
@@ -344,9 +321,7 @@ def rev_interp_bygrid_plot():
     # Show plot
     # plt.show()
 
-def interp_time_method_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(INTERP_METRICS)
+def interp_time_method_plot(df: pd.DataFrame):
     aggregated_df = df.groupby(["grid", "method"], as_index=False)["interpolation_duration"].sum()
 
     method_order = ["linear", "cubic", "multiquadric"]
@@ -379,9 +354,7 @@ def interp_time_method_plot():
     # Show plot
     # plt.show()
 
-def interp_time_grid_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(INTERP_METRICS)
+def interp_time_grid_plot(df: pd.DataFrame):
     aggregated_df = df.groupby(["grid", "method"], as_index=False)["interpolation_duration"].sum()
 
     # load config
@@ -411,9 +384,7 @@ def interp_time_grid_plot():
     # Show plot
     # plt.show()
 
-def train_time_grid_plot():
-    # Load the data from the CSV file
-    df = pd.read_csv(TRAIN_METRICS)
+def train_time_grid_plot(df: pd.DataFrame):
     aggregated_df = df.groupby(["grid", "method"], as_index=False)["training_duration"].sum()
 
     # load config
@@ -443,13 +414,9 @@ def train_time_grid_plot():
     # Show plot
     # plt.show()
 
-def time_grid_plot():
+def time_grid_plot(df_interp: pd.DataFrame, df_train: pd.DataFrame):
     """ Creates a single figure with two subplots: Interpolation Time vs Grid & Training Time vs Grid """
     
-    # Load the data from CSV files
-    df_interp = pd.read_csv(INTERP_METRICS)
-    df_train = pd.read_csv(TRAIN_METRICS)
-
     # Aggregate data
     aggregated_interp = df_interp.groupby(["grid", "method"], as_index=False)["interpolation_duration"].sum()
     aggregated_train = df_train.groupby(["grid", "method"], as_index=False)["training_duration"].sum()
@@ -517,13 +484,22 @@ def time_grid_plot():
 
 
 if __name__ == "__main__":
-    tst_simple_bymethod_plot()
-    tst_simple_bygrid_plot()
-    tst_cross_bymethod_plot()
-    tst_cross_bygrid_plot()
-    rev_interp_bymethod_plot()
-    rev_interp_bygrid_plot()
-    interp_time_method_plot()
-    interp_time_grid_plot()
-    train_time_grid_plot()
-    time_grid_plot()
+    # load each metrics file once for all plots
+    tst_df = pd.read_csv(TST_METRICS)
+    rev_df = pd.read_csv(REV_INTERP_METRICS)
+    interp_df = pd.read_csv(INTERP_METRICS)
+    train_df = pd.read_csv(TRAIN_METRICS)
+
+    # filters test data to models tested with their own method
+    tst_simple_df = tst_df[tst_df['model_method'] == tst_df['test_method']]
+
+    tst_simple_bymethod_plot(tst_simple_df)
+    tst_simple_bygrid_plot(tst_simple_df)
+    tst_cross_bymethod_plot(tst_df)
+    tst_cross_bygrid_plot(tst_df)
+    rev_interp_bymethod_plot(rev_df)
+    rev_interp_bygrid_plot(rev_df)
+    interp_time_method_plot(interp_df)
+    interp_time_grid_plot(interp_df)
+    train_time_grid_plot(train_df)
+    time_grid_plot(interp_df, train_df)